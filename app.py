@@ -1,28 +1,102 @@
 import sys
 import os
+import re
 import subprocess
 import threading
+import functools
 import http.server
 import socketserver
-import time  # ★ 新增：用来生成不重复的 query
+import socket
+import urllib.parse
+import time  # SIGN_DEBUG_NOCACHE 时用来生成不重复的 query
 
 from PyQt5 import uic
 from PyQt5.QtWidgets import QApplication, QWidget, QFrame, QVBoxLayout
 from PyQt5.QtWebEngineWidgets import QWebEngineView, QWebEnginePage, QWebEngineProfile  # ★ 新增 QWebEngineProfile
-from PyQt5.QtCore import QUrl, Qt
+from PyQt5.QtCore import QUrl, Qt, QCoreApplication
 
 from camera_widget import CameraWidget
 
+# UI 文件用绝对路径，不依赖当前工作目录
+UI_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "src", "signdemo.ui")
+
+# Cache-Control 策略：
+#   文件名带内容 hash 的资源（如 app.3f9a1c2b.js）-> 长缓存 immutable
+#   其它（model.glb / three.min.js / *_frames.json 等固定文件名）-> no-cache，靠 Last-Modified 走 304
+#   index.html -> no-cache, no-store，页面本身总是最新
+IMMUTABLE_SUFFIXES = (".glb", ".js", ".wasm", ".png", ".woff2")
+HASHED_NAME_RE = re.compile(r"[.-][0-9a-fA-F]{8,}\.[^./]+$")
+
+
+class ReuseTCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    # 每个请求一个线程：index.html / js / glb 并行下载
+    # SO_REUSEADDR 已足够让快速重启绕过 TIME_WAIT；不开 SO_REUSEPORT，
+    # 否则第二个实例也能 bind 同一端口，请求和 fps_log 会被分到两个进程
+    allow_reuse_address = True
+    daemon_threads = True
+    # 页面会同时请求很多资源，默认 backlog=5 太小
+    request_queue_size = 128
+
+    def finish_request(self, request, client_address):
+        # 关掉 Nagle，小响应（304 等）不被延迟合并
+        try:
+            request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except OSError:
+            pass
+        super().finish_request(request, client_address)
+
+
+class CachingHandler(http.server.SimpleHTTPRequestHandler):
+    """静态文件服务 + Cache-Control 头"""
+
+    def send_response(self, code, message=None):
+        self._status = code  # end_headers 里只给 2xx 加缓存头
+        super().send_response(code, message)
+
+    def end_headers(self):
+        status = getattr(self, "_status", 0)
+        if self.command in ("GET", "HEAD") and 200 <= status < 300:
+            path = urllib.parse.urlsplit(self.path).path
+            if path == "/" or path.endswith(".html"):
+                self.send_header("Cache-Control", "no-cache, no-store")
+            elif path.endswith(IMMUTABLE_SUFFIXES) and HASHED_NAME_RE.search(path):
+                self.send_header("Cache-Control", "public, max-age=31536000, immutable")
+            else:
+                self.send_header("Cache-Control", "no-cache")
+        super().end_headers()
+
 
 def start_server(web_dir):
     """启动本地 HTTP 服务器，根目录为 web_dir"""
-    Handler = http.server.SimpleHTTPRequestHandler
-    os.chdir(web_dir)  # 在 server 线程里修改当前目录
-    httpd = socketserver.TCPServer(("127.0.0.1", 8000), Handler)
+    # 用 directory 参数绑定根目录，不再 os.chdir（避免在 server 线程里改全局 CWD）
+    Handler = functools.partial(CachingHandler, directory=web_dir)
+    httpd = ReuseTCPServer(("127.0.0.1", 8000), Handler)
     print(f"Serving HTTP on 127.0.0.1:8000, root = {web_dir}")
     httpd.serve_forever()
 
 
+# Chromium 参数：强制 GPU 光栅化，避免 WebEngine 悄悄退回软件合成（three.js 掉帧的主要原因）
+WEBENGINE_GPU_FLAGS = (
+    "--enable-gpu-rasterization --ignore-gpu-blocklist "
+    "--enable-zero-copy --enable-accelerated-video-decode"
+)
+
+
+def setup_webengine_gpu():
+    """
+    必须在 QApplication 创建之前调用。
+    设 SIGN_WEBENGINE_SOFTWARE=1 可恢复原来的行为（不加任何 GPU 参数）。
+    """
+    if os.environ.get("SIGN_WEBENGINE_SOFTWARE") == "1":
+        print("[WebEngine] GPU flags disabled by SIGN_WEBENGINE_SOFTWARE=1")
+        return
+    # 保留用户自己设置的参数
+    existing = os.environ.get("QTWEBENGINE_CHROMIUM_FLAGS", "")
+    os.environ["QTWEBENGINE_CHROMIUM_FLAGS"] = f"{existing} {WEBENGINE_GPU_FLAGS}".strip()
+    # GPU 进程和 Qt widget 共享 OpenGL context
+    QCoreApplication.setAttribute(Qt.AA_ShareOpenGLContexts, True)
+
+
 class DebugWebPage(QWebEnginePage):
     """把 JS 的 console 输出重定向到 Python 终端"""
 
@@ -36,7 +110,7 @@ class MyApp(QWidget):
     def __init__(self):
         super(MyApp, self).__init__()
         # 加载 Qt Designer 设计的 UI
-        uic.loadUi('../src/signdemo.ui', self)
+        uic.loadUi(UI_PATH, self)
         self.setWindowTitle("Sign Translator")
         self.show()
 
@@ -55,13 +129,14 @@ class MyApp(QWidget):
         debug_page = DebugWebPage(self.web_view)
         self.web_view.setPage(debug_page)
 
-        # ★★ 关键：关闭 WebEngine 缓存，避免一直用旧的 index.html ★★
-        profile: QWebEngineProfile = self.web_view.page().profile()
-        profile.setHttpCacheType(QWebEngineProfile.NoCache)
-        profile.clearHttpCache()
-
-        # 每次加载 index.html 时加一个不同的 query，强制绕过所有缓存
-        url_str = f"http://127.0.0.1:8000/index.html?v={time.time()}"
+        # 缓存交给 server 的 Cache-Control / Last-Modified：js / glb 走 304 校验，index.html 不缓存
+        url_str = "http://127.0.0.1:8000/index.html"
+        if os.environ.get("SIGN_DEBUG_NOCACHE"):
+            # 调试用：关闭 WebEngine 缓存 + 加 query，强制绕过所有缓存
+            profile: QWebEngineProfile = self.web_view.page().profile()
+            profile.setHttpCacheType(QWebEngineProfile.NoCache)
+            profile.clearHttpCache()
+            url_str += f"?v={time.time()}"
         print("Loading index.html with url:", url_str)
         self.web_view.load(QUrl(url_str))
 
@@ -69,6 +144,12 @@ class MyApp(QWidget):
         motion_layout.setContentsMargins(0, 0, 0, 0)
         motion_layout.addWidget(self.web_view)
 
+    def closeEvent(self, event):
+        # 子控件收不到 closeEvent，主窗口关闭时手动停掉摄像头线程
+        if self.camera_widget is not None:
+            self.camera_widget.stop()
+        super().closeEvent(event)
+
     def keyPressEvent(self, event):
         """这里只保留按键事件占位，方便后续你要加别的快捷键"""
         if event.key() == Qt.Key_Escape:
@@ -80,20 +161,44 @@ class MyApp(QWidget):
 if __name__ == "__main__":
     main_pid = os.getpid()
     print("PID:", main_pid)
-    monitor_path = os.path.join(
-        os.path.dirname(os.path.abspath(__file__)),
-        "pc_test",
-        "monitor_process.py"
-    )
-    subprocess.Popen([
-        sys.executable,  # 当前 python
-        monitor_path,  # 监控脚本
-        str(main_pid)
-    ])
+    # SIGN_MONITOR=1（默认）：监控跑在本进程的后台线程里，省一个 python 解释器
+    #   （注意：monitor 自己的 CPU 也会算进进程树）
+    # SIGN_MONITOR=subprocess：独立进程监控，硬件验证要精确数字时用
+    # SIGN_MONITOR=0：不监控
+    monitor_mode = os.environ.get("SIGN_MONITOR", "1")
+    monitor_stop = None
+    monitor_thread = None
+    if monitor_mode == "1":
+        from pc_test.monitor_process import monitor
+        monitor_stop = threading.Event()
+        monitor_thread = threading.Thread(
+            target=monitor,
+            args=(main_pid, "resource_log.csv", 1.0, monitor_stop),
+            daemon=True,
+        )
+        monitor_thread.start()
+    elif monitor_mode == "subprocess":
+        monitor_path = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            "pc_test",
+            "monitor_process.py"
+        )
+        subprocess.Popen([
+            sys.executable,  # 当前 python
+            monitor_path,  # 监控脚本
+            str(main_pid)
+        ])
     # 启动本地 HTTP 服务器，目录为当前文件所在目录下的 web/
     web_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "web")
     threading.Thread(target=start_server, args=(web_dir,), daemon=True).start()
 
+    setup_webengine_gpu()
     app = QApplication(sys.argv)
     window = MyApp()
-    sys.exit(app.exec_())
+    exit_code = app.exec_()
+
+    # 让监控线程把最后一批数据写完再退出
+    if monitor_stop is not None:
+        monitor_stop.set()
+        monitor_thread.join(timeout=3.0)
+    sys.exit(exit_code)
@@ -1,40 +1,123 @@
 import sys
 import os
+import re
 import subprocess
 import threading
+import functools
 import time
-import json
 import csv
+import atexit
+import collections
 import http.server
 import socketserver
+import socket
+import urllib.parse
+import mimetypes
+import email.utils
 
 from PyQt5 import uic
 from PyQt5.QtWidgets import QApplication, QWidget, QFrame, QVBoxLayout
 from PyQt5.QtWebEngineWidgets import QWebEngineView, QWebEnginePage, QWebEngineProfile
-from PyQt5.QtCore import QUrl, Qt
+from PyQt5.QtCore import QUrl, Qt, QCoreApplication
 
 from camera_widget import CameraWidget
 
+# 可选：orjson 比标准库 json 快，且直接接受 bytes
+try:
+    import orjson as _json
+except ImportError:
+    import json as _json
+
 # =========================================================
 # TEST SWITCHES (你测试时只改这里)
 # =========================================================
 ENABLE_RENDER = True     # Render-only / Capture+Render 时设 True
 ENABLE_CAPTURE = True    # Render-only 时设 False
 
+# UI 文件用绝对路径，不依赖当前工作目录
+UI_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "src", "signdemo.ui")
+
 
 # =========================================================
 # HTTP Server with FPS logging
 # =========================================================
-class ReuseTCPServer(socketserver.TCPServer):
+class ReuseTCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    # 每个请求一个线程：静态资源并行下载，不会堵住 /log_fps
+    # SO_REUSEADDR 已足够让快速重启绕过 TIME_WAIT；不开 SO_REUSEPORT，
+    # 否则第二个实例也能 bind 同一端口，请求和 fps_log 会被分到两个进程
     allow_reuse_address = True
+    daemon_threads = True
+    # 页面会同时请求很多资源，默认 backlog=5 太小
+    request_queue_size = 128
+
+    def finish_request(self, request, client_address):
+        # 关掉 Nagle，小包（60Hz 的 FPS POST）不被延迟合并
+        try:
+            request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except OSError:
+            pass
+        super().finish_request(request, client_address)
+
+
+# Cache-Control 策略：
+#   文件名带内容 hash 的资源（如 app.3f9a1c2b.js）-> 长缓存 immutable
+#   其它（model.glb / three.min.js / *_frames.json 等固定文件名）-> no-cache，靠 Last-Modified 走 304
+#   index.html -> no-cache, no-store，页面本身总是最新
+IMMUTABLE_SUFFIXES = (".glb", ".js", ".wasm", ".png", ".woff2")
+HASHED_NAME_RE = re.compile(r"[.-][0-9a-fA-F]{8,}\.[^./]+$")
 
 
 class FPSLoggingHandler(http.server.SimpleHTTPRequestHandler):
     """
     GET  : 静态文件服务（index.html / js / glb / json 等）
-    POST : /log_fps  -> append 写 fps_log.csv
+    POST : /log_fps  -> 先放进内存 buffer，由后台线程批量写 fps_log.csv
+           body 可以是 JSON {"fps":..,"t_ms":..} 或 form 编码 fps=..&t_ms=..
     """
     fps_csv_path = None  # 在 start_server 里设置
+    fps_writer = None    # 长期打开的 csv.writer（start_server 里设置）
+    fps_lock = threading.Lock()        # 保护 fps_buffer（handler 线程只拿这个，很快）
+    fps_write_lock = threading.Lock()  # 串行化写文件（后台 flush 线程 / atexit）
+    fps_buffer = collections.deque()
+
+    # 启动时把 web_dir 里的静态文件一次读进内存（start_server 里填）
+    ASSETS = {}         # rel_path -> bytes
+    ASSET_HEADERS = {}  # rel_path -> (Content-Type, Last-Modified)
+
+    def do_GET(self):
+        path = urllib.parse.unquote(urllib.parse.urlsplit(self.path).path)
+        rel_path = path.lstrip("/") or "index.html"
+        data = self.ASSETS.get(rel_path)
+        if data is None:
+            return super().do_GET()  # 不在缓存里的走原来的磁盘逻辑
+
+        ctype, last_modified = self.ASSET_HEADERS[rel_path]
+        if self.headers.get("If-Modified-Since") == last_modified:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Last-Modified", last_modified)
+        self.end_headers()  # Cache-Control 在 end_headers 里统一加
+        self.wfile.write(data)
+
+    def send_response(self, code, message=None):
+        self._status = code  # end_headers 里只给 2xx 加缓存头
+        super().send_response(code, message)
+
+    def end_headers(self):
+        status = getattr(self, "_status", 0)
+        if self.command in ("GET", "HEAD") and 200 <= status < 300:
+            path = urllib.parse.urlsplit(self.path).path
+            if path == "/" or path.endswith(".html"):
+                self.send_header("Cache-Control", "no-cache, no-store")
+            elif path.endswith(IMMUTABLE_SUFFIXES) and HASHED_NAME_RE.search(path):
+                self.send_header("Cache-Control", "public, max-age=31536000, immutable")
+            else:
+                self.send_header("Cache-Control", "no-cache")
+        super().end_headers()
 
     def do_POST(self):
         if self.path != "/log_fps":
@@ -45,7 +128,13 @@ class FPSLoggingHandler(http.server.SimpleHTTPRequestHandler):
         try:
             length = int(self.headers.get("Content-Length", "0"))
             raw = self.rfile.read(length)
-            payload = json.loads(raw.decode("utf-8"))
+
+            # 两种 body 都支持：fps=60.1&t_ms=12345（最省）或 JSON
+            ctype = self.headers.get("Content-Type", "")
+            if ctype.startswith("application/x-www-form-urlencoded"):
+                payload = dict(urllib.parse.parse_qsl(raw.decode("ascii")))
+            else:
+                payload = _json.loads(raw)  # bytes 直接解析，省一次 decode
 
             fps = payload.get("fps", "")
             browser_t_ms = payload.get("t_ms", "")
@@ -53,9 +142,9 @@ class FPSLoggingHandler(http.server.SimpleHTTPRequestHandler):
             # epoch time 用于和 resource_log.csv 对齐
             epoch_sec = time.time()
 
-            with open(self.fps_csv_path, "a", newline="") as f:
-                w = csv.writer(f)
-                w.writerow([epoch_sec, browser_t_ms, fps])
+            # 只进 buffer，不在 handler 线程里做文件 IO
+            with self.fps_lock:
+                self.fps_buffer.append([epoch_sec, browser_t_ms, fps])
 
             self.send_response(204)
             self.end_headers()
@@ -64,15 +153,66 @@ class FPSLoggingHandler(http.server.SimpleHTTPRequestHandler):
             self.end_headers()
 
 
+FPS_FLUSH_INTERVAL_S = 0.2  # 后台线程每 200ms 把 buffer 批量写盘
+
+
+def _flush_fps_buffer(f):
+    """
+    把 FPSLoggingHandler.fps_buffer 里积累的行一次性写入并 flush。
+    后台线程和 atexit 都会调用：取 batch + 写文件整个放在 fps_write_lock 里，
+    两边不会同时写，也不会把后取的 batch 先写进去。
+    """
+    with FPSLoggingHandler.fps_write_lock:
+        with FPSLoggingHandler.fps_lock:
+            batch = list(FPSLoggingHandler.fps_buffer)
+            FPSLoggingHandler.fps_buffer.clear()
+        if batch:
+            FPSLoggingHandler.fps_writer.writerows(batch)
+            f.flush()
+
+
+def _fps_flush_loop(f):
+    while True:
+        time.sleep(FPS_FLUSH_INTERVAL_S)
+        try:
+            _flush_fps_buffer(f)
+        except Exception as e:
+            print("[fps_log] flush failed:", e)
+
+
+def _load_assets(web_dir: str, skip=()):
+    """
+    把 web_dir 下的文件读进 FPSLoggingHandler.ASSETS（skip 里的绝对路径和 .html 除外）。
+    这是启动时的快照：运行中改了这些文件要重启 server 才会生效。
+    """
+    assets, headers = {}, {}
+    for dirpath, _, filenames in os.walk(web_dir):
+        for name in filenames:
+            abs_path = os.path.join(dirpath, name)
+            # .html 不进缓存：index.html 要 no-cache 且改了就生效，每次从磁盘读
+            if abs_path in skip or name.endswith(".html"):
+                continue
+            rel_path = os.path.relpath(abs_path, web_dir).replace(os.sep, "/")
+            with open(abs_path, "rb") as f:
+                assets[rel_path] = f.read()
+            ctype = mimetypes.guess_type(name)[0] or "application/octet-stream"
+            if name.endswith(".glb"):
+                ctype = "model/gltf-binary"
+            last_modified = email.utils.formatdate(os.path.getmtime(abs_path), usegmt=True)
+            headers[rel_path] = (ctype, last_modified)
+    FPSLoggingHandler.ASSETS = assets
+    FPSLoggingHandler.ASSET_HEADERS = headers
+    print(f"Loaded {len(assets)} assets ({sum(map(len, assets.values())) / 1048576:.1f} MB) into memory")
+
+
 def start_server(web_dir: str, port: int = 8000):
     """
     启动本地 HTTP 服务器，根目录为 web_dir
     同时支持 POST /log_fps 写 fps_log.csv
     """
-    # 把 server 的工作目录切到 web/，这样静态文件路径就是相对路径
-    os.chdir(web_dir)
+    web_dir = os.path.abspath(web_dir)
 
-    # fps_log.csv 放在 web_dir（你也可以改成项目根目录）
+    # fps_log.csv 放在 web_dir（你也可以改成项目根目录），启动时算好绝对路径
     fps_csv_path = os.path.join(web_dir, "fps_log.csv")
     if not os.path.exists(fps_csv_path):
         with open(fps_csv_path, "w", newline="") as f:
@@ -80,11 +220,48 @@ def start_server(web_dir: str, port: int = 8000):
 
     FPSLoggingHandler.fps_csv_path = fps_csv_path
 
-    httpd = ReuseTCPServer(("127.0.0.1", port), FPSLoggingHandler)
+    # 文件只打开一次（64KB 用户态 buffer），由后台线程定时批量写
+    fps_file = open(fps_csv_path, "a", buffering=1 << 16, newline="")
+    FPSLoggingHandler.fps_writer = csv.writer(fps_file)
+    threading.Thread(target=_fps_flush_loop, args=(fps_file,), daemon=True).start()
+    # 退出时把最后一批也写进去
+    atexit.register(_flush_fps_buffer, fps_file)
+
+    # 静态文件一次读进内存，GET 直接从内存发（fps_log.csv 会变、.html 要保持最新，都不缓存）
+    _load_assets(web_dir, skip=(fps_csv_path,))
+
+    # 用 directory 参数绑定根目录，不再 os.chdir（避免在 server 线程里改全局 CWD）
+    handler = functools.partial(FPSLoggingHandler, directory=web_dir)
+    httpd = ReuseTCPServer(("127.0.0.1", port), handler)
     print(f"Serving HTTP on 127.0.0.1:{port}, root = {web_dir}")
     httpd.serve_forever()
 
 
+# =========================================================
+# WebEngine GPU
+# =========================================================
+# Chromium 参数：强制 GPU 光栅化，避免 WebEngine 悄悄退回软件合成（three.js 掉帧的主要原因）
+WEBENGINE_GPU_FLAGS = (
+    "--enable-gpu-rasterization --ignore-gpu-blocklist "
+    "--enable-zero-copy --enable-accelerated-video-decode"
+)
+
+
+def setup_webengine_gpu():
+    """
+    必须在 QApplication 创建之前调用。
+    设 SIGN_WEBENGINE_SOFTWARE=1 可恢复原来的行为（不加任何 GPU 参数）。
+    """
+    if os.environ.get("SIGN_WEBENGINE_SOFTWARE") == "1":
+        print("[WebEngine] GPU flags disabled by SIGN_WEBENGINE_SOFTWARE=1")
+        return
+    # 保留用户自己设置的参数
+    existing = os.environ.get("QTWEBENGINE_CHROMIUM_FLAGS", "")
+    os.environ["QTWEBENGINE_CHROMIUM_FLAGS"] = f"{existing} {WEBENGINE_GPU_FLAGS}".strip()
+    # GPU 进程和 Qt widget 共享 OpenGL context
+    QCoreApplication.setAttribute(Qt.AA_ShareOpenGLContexts, True)
+
+
 # =========================================================
 # WebEngine debug page
 # =========================================================
@@ -107,7 +284,7 @@ class MyApp(QWidget):
         self.enable_capture = ENABLE_CAPTURE
 
         # 加载 Qt Designer UI
-        uic.loadUi('../src/signdemo.ui', self)
+        uic.loadUi(UI_PATH, self)
         self.setWindowTitle("Sign Translator")
         self.show()
 
@@ -139,13 +316,14 @@ class MyApp(QWidget):
             debug_page = DebugWebPage(self.web_view)
             self.web_view.setPage(debug_page)
 
-            # 关闭缓存 + 清缓存，避免旧页面
-            profile: QWebEngineProfile = self.web_view.page().profile()
-            profile.setHttpCacheType(QWebEngineProfile.NoCache)
-            profile.clearHttpCache()
-
-            # 加 query 强制刷新
-            url_str = f"http://127.0.0.1:8000/index.html?v={time.time()}"
+            # 缓存交给 server 的 Cache-Control / Last-Modified：js / glb 走 304 校验，index.html 不缓存
+            url_str = "http://127.0.0.1:8000/index.html"
+            if os.environ.get("SIGN_DEBUG_NOCACHE"):
+                # 调试用：关闭缓存 + 清缓存 + 加 query 强制刷新
+                profile: QWebEngineProfile = self.web_view.page().profile()
+                profile.setHttpCacheType(QWebEngineProfile.NoCache)
+                profile.clearHttpCache()
+                url_str += f"?v={time.time()}"
             print("Loading index.html with url:", url_str)
             self.web_view.load(QUrl(url_str))
 
@@ -154,6 +332,12 @@ class MyApp(QWidget):
             self.web_view = None
             print("[TEST] Render DISABLED")
 
+    def closeEvent(self, event):
+        # 子控件收不到 closeEvent，主窗口关闭时手动停掉摄像头线程
+        if self.camera_widget is not None:
+            self.camera_widget.stop()
+        super().closeEvent(event)
+
     def keyPressEvent(self, event):
         if event.key() == Qt.Key_Escape:
             self.close()
@@ -181,6 +365,7 @@ if __name__ == "__main__":
         web_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "web")
         threading.Thread(target=start_server, args=(web_dir,), daemon=True).start()
 
+    setup_webengine_gpu()
     app = QApplication(sys.argv)
     window = MyApp()
     sys.exit(app.exec_())
\ No newline at end of file
@@ -1,18 +1,89 @@
 import sys
 import os
+import threading
+import time
 
 import cv2
+import numpy as np
 from PyQt5 import uic
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QLabel, QVBoxLayout, QFrame
 )
-from PyQt5.QtCore import QUrl, QTimer, Qt
+from PyQt5.QtCore import QUrl, QTimer, Qt, QT_VERSION
 from PyQt5.QtGui import QImage, QPixmap
 from PyQt5.QtWebEngineWidgets import QWebEngineView   # 以后右侧用
 
 
+# Qt 5.14+ 可以直接显示 BGR，省掉 cvtColor(BGR->RGB) 这一遍整帧拷贝
+HAS_BGR888 = QT_VERSION >= 0x050E00 and hasattr(QImage, "Format_BGR888")
+
+
+def _capture_backend():
+    """按平台选 VideoCapture 后端"""
+    if sys.platform == "win32":
+        return cv2.CAP_DSHOW
+    if sys.platform.startswith("linux"):
+        return cv2.CAP_V4L2
+    return cv2.CAP_ANY
+
+
+class CaptureThread(threading.Thread):
+    """
+    后台线程一直 cap.read()，只保留最新一帧（single-slot），
+    GUI 线程不再被阻塞的 read() 卡住，也不会积压旧帧。
+    """
+
+    def __init__(self, cap):
+        super().__init__(daemon=True)
+        self.cap = cap
+        self._latest = None
+        self._lock = threading.Lock()
+        self._running = True
+        self._finished = False
+        self._release_on_exit = False
+
+    def run(self):
+        while self._running:
+            ret, frame = self.cap.read()
+            if not ret:
+                time.sleep(0.01)  # 摄像头暂时没帧，避免空转
+                continue
+            with self._lock:
+                self._latest = frame
+
+        with self._lock:
+            self._finished = True
+            release = self._release_on_exit
+        if release:
+            self.cap.release()
+
+    def take_latest(self):
+        """取走最新一帧；没有新帧时返回 None"""
+        with self._lock:
+            frame = self._latest
+            self._latest = None
+        return frame
+
+    def stop(self, timeout=1.0):
+        """通知线程退出并等待；返回 True 表示线程已经结束"""
+        self._running = False
+        self.join(timeout)
+        return not self.is_alive()
+
+    def release_when_done(self):
+        """
+        read() 还卡在驱动里时不能从别的线程 release，
+        交给采集线程退出循环后自己释放；线程已经结束就马上释放。
+        """
+        with self._lock:
+            if not self._finished:
+                self._release_on_exit = True
+                return
+        self.cap.release()
+
+
 class CameraWidget(QWidget):
-    def __init__(self, camera_index=0, parent=None):
+    def __init__(self, camera_index=0, parent=None, capture_size=(640, 480)):
         super().__init__(parent)
 
         self.label = QLabel("Camera")
@@ -23,38 +94,82 @@ class CameraWidget(QWidget):
         layout.setContentsMargins(0, 0, 0, 0)
         layout.addWidget(self.label)
 
-        # 打开摄像头
-        self.cap = cv2.VideoCapture(camera_index)
+        # 打开摄像头：显式选后端（Windows 默认的 MSMF 会内部缓存好几帧）
+        self.cap = cv2.VideoCapture(camera_index, _capture_backend())
+        if not self.cap.isOpened():
+            self.cap = cv2.VideoCapture(camera_index)  # 回退到 OpenCV 默认后端
+        if self.cap.isOpened():
+            print("[camera] backend:", self.cap.getBackendName())
+        # 驱动里只留 1 帧，read() 拿到的总是最新画面
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        # MJPEG 比 YUY2 占 USB 带宽少，HD 分辨率下帧率更稳
+        self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*"MJPG"))
+        # 直接按显示需要的分辨率采集，避免把 1080p 缩到几百像素的 label 上
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, capture_size[0])
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, capture_size[1])
+
+        # 复用的帧 buffer，第一次拿到帧时再按尺寸分配
+        self._flip_buf = None
+        self._rgb_buf = None
+
+        # 采集放到后台线程，定时器只负责显示最新一帧
+        self.capture_thread = CaptureThread(self.cap)
+        if self.cap.isOpened():
+            self.capture_thread.start()
 
         # 定时器，约 30fps 刷新
         self.timer = QTimer(self)
         self.timer.timeout.connect(self.update_frame)
         self.timer.start(33)
 
+        # CameraWidget 是子控件，主窗口关闭时收不到 closeEvent，
+        # 所以在程序退出时也停一次采集线程
+        self._stopped = False
+        app = QApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.stop)
+
     def update_frame(self):
-        if not self.cap.isOpened():
-            return
-        ret, frame = self.cap.read()
-        if not ret:
-            return
+        frame = self.capture_thread.take_latest()
+        if frame is None:
+            return  # 没有新帧就不重绘
 
-        # 镜像一下，更像“照镜子”
-        frame = cv2.flip(frame, 1)
+        if self._flip_buf is None or self._flip_buf.shape != frame.shape:
+            self._flip_buf = np.empty_like(frame)
+            self._rgb_buf = None if HAS_BGR888 else np.empty_like(frame)
 
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        h, w, ch = frame_rgb.shape
+        # 镜像一下，更像“照镜子”；结果写进复用的 buffer，不每帧分配新内存
+        cv2.flip(frame, 1, dst=self._flip_buf)
+        h, w, ch = self._flip_buf.shape
         bytes_per_line = ch * w
 
-        qimg = QImage(frame_rgb.data, w, h, bytes_per_line, QImage.Format_RGB888)
+        # QImage 直接引用 buffer 的内存，buffer 挂在 self 上保证有效
+        if HAS_BGR888:
+            qimg = QImage(self._flip_buf.data, w, h, bytes_per_line, QImage.Format_BGR888)
+        else:
+            cv2.cvtColor(self._flip_buf, cv2.COLOR_BGR2RGB, dst=self._rgb_buf)
+            qimg = QImage(self._rgb_buf.data, w, h, bytes_per_line, QImage.Format_RGB888)
         pix = QPixmap.fromImage(qimg)
         self.label.setPixmap(
             pix.scaled(
-                self.label.size(), Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation
+                self.label.size(), Qt.KeepAspectRatioByExpanding, Qt.FastTransformation
             )
         )
 
-    def closeEvent(self, event):
+    def stop(self):
+        """停止刷新和采集线程，并释放摄像头（可重复调用）"""
+        if self._stopped:
+            return
+        self._stopped = True
+        self.timer.stop()
+        if self.capture_thread.is_alive() and not self.capture_thread.stop():
+            # 线程还在 read() 里，释放交给它自己，避免并发 release 把后端搞崩
+            self.capture_thread.release_when_done()
+            return
         if self.cap.isOpened():
             self.cap.release()
+
+    def closeEvent(self, event):
+        self.stop()
         super().closeEvent(event)
 
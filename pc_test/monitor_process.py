@@ -1,7 +1,12 @@
+import os
 import time
 import csv
+import atexit
+import signal
+import threading
 import psutil
 import sys
+from typing import Optional
 
 # optional NVIDIA GPU support
 try:
@@ -21,8 +26,27 @@ def _safe_process(pid: int):
         return None
 
 
-def _get_proc_tree(root: psutil.Process):
-    """Return a de-duplicated list of root + all recursive children that are alive."""
+# the tree rarely changes once Qt/WebEngine has spawned its workers,
+# so only re-walk it every N ticks (or when a process disappeared)
+PROC_TREE_REFRESH_TICKS = 5
+
+# rows are collected in memory and written + flushed once every N ticks
+ROWS_PER_WRITE = 10
+
+_PROC_ATTRS = ["cpu_percent", "memory_info", "num_threads"]
+
+# Linux fast path: num_threads + rss come from a single /proc/<pid>/stat read
+_USE_PROC_STAT = sys.platform == "linux"
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if _USE_PROC_STAT else 0
+
+
+def _get_proc_tree(root: psutil.Process, known=None):
+    """
+    Return a de-duplicated list of root + all recursive children that are alive.
+    Process objects already in `known` (pid -> Process) are reused so their
+    cpu_percent counters keep working across refreshes.
+    """
+    known = known or {}
     procs = [root]
     try:
         procs.extend(root.children(recursive=True))
@@ -36,6 +60,7 @@ def _get_proc_tree(root: psutil.Process):
             if p.pid in seen:
                 continue
             seen.add(p.pid)
+            p = known.get(p.pid, p)
             if p.is_running():
                 uniq.append(p)
         except Exception:
@@ -52,6 +77,16 @@ def _warmup_cpu(procs):
             pass
 
 
+def _fast_stat(pid: int):
+    """Return (num_threads, rss_bytes) from one read of /proc/<pid>/stat."""
+    with open(f"/proc/{pid}/stat", "rb") as f:
+        data = f.read()
+    # comm (field 2) may contain spaces, so split after its closing paren;
+    # parts[0] is then field 3 (state)
+    parts = data[data.rindex(b")") + 2:].split()
+    return int(parts[17]), int(parts[21]) * _PAGE_SIZE
+
+
 def _sum_cpu_mem_threads(procs):
     cpu_sum = 0.0
     rss_sum_mb = 0.0
@@ -59,70 +94,143 @@ def _sum_cpu_mem_threads(procs):
     alive = 0
 
     for p in procs:
-        try:
-            cpu_sum += p.cpu_percent(None)
-            rss_sum_mb += p.memory_info().rss / 1024 / 1024
-            threads_sum += p.num_threads()
+        if _USE_PROC_STAT:
+            try:
+                # cpu_percent stays on psutil for correct per-interval deltas
+                cpu = p.cpu_percent(None)
+                num_threads, rss = _fast_stat(p.pid)
+            except Exception:
+                continue
+            cpu_sum += cpu
+            rss_sum_mb += rss / 1048576
+            threads_sum += num_threads
             alive += 1
+            continue
+
+        try:
+            # one oneshot() read instead of three separate calls
+            info = p.as_dict(attrs=_PROC_ATTRS, ad_value=None)
         except Exception:
             continue
+        if info["cpu_percent"] is not None:
+            cpu_sum += info["cpu_percent"]
+        if info["memory_info"] is not None:
+            rss_sum_mb += info["memory_info"].rss / 1048576
+        if info["num_threads"] is not None:
+            threads_sum += info["num_threads"]
+        alive += 1
 
     return cpu_sum, rss_sum_mb, threads_sum, alive
 
 
-def _get_gpu_overall():
-    """Return (gpu_util_percent, gpu_mem_used_mb) or ("","") if unavailable."""
-    if not GPU_AVAILABLE:
-        return "", ""
-    try:
-        util = nvmlDeviceGetUtilizationRates(handle)
-        meminfo = nvmlDeviceGetMemoryInfo(handle)
-        return util.gpu, meminfo.used / 1024 / 1024
-    except Exception:
-        return "", ""
+# set MONITOR_GPU_HEADLESS=1 to skip the graphics-process enumeration
+# (nothing renders on a headless box, so it only costs an NVML call)
+GPU_HEADLESS = os.environ.get("MONITOR_GPU_HEADLESS", "0") == "1"
 
 
-def _get_gpu_mem_for_pids(target_pids: set[int]):
+def _make_gpu_readers():
     """
-    Best-effort process GPU memory (MB) for a set of PIDs.
-    Tries compute + graphics running processes. If nothing matched, returns "".
+    Build the two per-tick GPU readers once. The NVML handle and functions are
+    bound as default args so the hot loop does local (not module) lookups.
+    Returns (get_gpu_overall, get_gpu_mem_for_pids).
     """
     if not GPU_AVAILABLE:
-        return ""
+        return (lambda: ("", "")), (lambda target_pids: "")
+
+    def get_gpu_overall(_h=handle,
+                        _util=nvmlDeviceGetUtilizationRates,
+                        _mem=nvmlDeviceGetMemoryInfo):
+        """Return (gpu_util_percent, gpu_mem_used_mb) or ("","") if unavailable."""
+        try:
+            return _util(_h).gpu, _mem(_h).used / 1024 / 1024
+        except Exception:
+            return "", ""
+
+    def get_gpu_mem_for_pids(target_pids: frozenset[int],
+                             _h=handle,
+                             _cproc=nvmlDeviceGetComputeRunningProcesses,
+                             # may not exist in some pynvml versions/drivers
+                             _gproc=None if GPU_HEADLESS else globals().get(
+                                 "nvmlDeviceGetGraphicsRunningProcesses")):
+        """
+        Best-effort process GPU memory (MB) for a set of PIDs.
+        Tries compute + graphics running processes (each PID counted once).
+        If nothing matched, returns "".
+        """
+        running = []
+        try:
+            running.extend(_cproc(_h))
+        except Exception:
+            pass
+        if _gproc is not None:
+            try:
+                running.extend(_gproc(_h))
+            except Exception:
+                pass
+
+        used_bytes = 0
+        counted = set()
+        for p in running:
+            if p.pid not in target_pids or p.pid in counted:
+                continue
+            if mem := p.usedGpuMemory:
+                used_bytes += int(mem)
+                counted.add(p.pid)
+
+        if not counted:
+            return ""
+        return used_bytes / 1024 / 1024
+
+    return get_gpu_overall, get_gpu_mem_for_pids
 
-    used_bytes = 0
-    found = False
 
-    # compute processes
+_get_gpu_overall, _get_gpu_mem_for_pids = _make_gpu_readers()
+
+
+def _flush_quietly(f):
+    """Flush f if it is still open (safe to call from atexit / signal handlers)."""
     try:
-        for p in nvmlDeviceGetComputeRunningProcesses(handle):
-            if p.pid in target_pids and p.usedGpuMemory not in (None, 0):
-                used_bytes += int(p.usedGpuMemory)
-                found = True
+        if not f.closed:
+            f.flush()
     except Exception:
         pass
 
-    # graphics processes (may not exist in some pynvml versions/drivers)
+
+def _install_flush_on_exit(f):
+    """
+    Make sure buffered rows reach disk on exit or terminate().
+    Ctrl-C already raises KeyboardInterrupt, which monitor() handles; only
+    SIGTERM (sent by Popen.terminate()) needs a handler. Signal handlers can
+    only be installed from the main thread.
+    """
+    atexit.register(_flush_quietly, f)
+    if threading.current_thread() is not threading.main_thread():
+        return
+
+    def _on_sigterm(signum, frame):
+        _flush_quietly(f)
+        sys.exit(0)
+
     try:
-        for p in nvmlDeviceGetGraphicsRunningProcesses(handle):
-            if p.pid in target_pids and p.usedGpuMemory not in (None, 0):
-                used_bytes += int(p.usedGpuMemory)
-                found = True
-    except Exception:
+        signal.signal(signal.SIGTERM, _on_sigterm)
+    except (ValueError, OSError):
         pass
 
-    if not found:
-        return ""
-    return used_bytes / 1024 / 1024
-
 
-def monitor(pid: int, out_file: str = "resource_log.csv", interval: float = 1.0):
+def monitor(pid: int, out_file: str = "resource_log.csv", interval: float = 1.0,
+            stop_event: Optional[threading.Event] = None):
+    """
+    Sample the process tree of `pid` every `interval` seconds into `out_file`.
+    When run in a thread, set `stop_event` to end the loop and flush the CSV.
+    """
     root = _safe_process(pid)
     if root is None:
         print("Target process not found.")
         return
 
-    with open(out_file, "w", newline="") as f:
+    # fully buffered (64 KiB); rows are written in batches and flushed on exit
+    with open(out_file, "w", newline="", buffering=65536) as f:
+        _install_flush_on_exit(f)
         writer = csv.writer(f)
         writer.writerow([
             "time",
@@ -142,39 +250,59 @@ def monitor(pid: int, out_file: str = "resource_log.csv", interval: float = 1.0)
         procs = _get_proc_tree(root)
         _warmup_cpu(procs)
 
-        start = time.time()
-
-        while True:
-            try:
-                # refresh proc tree each tick (WebEngine children can appear later)
-                procs = _get_proc_tree(root)
-
-                cpu_total, rss_total_mb, threads_total, alive = _sum_cpu_mem_threads(procs)
-
-                gpu_util, gpu_mem = _get_gpu_overall()
-                proc_tree_gpu_mem = _get_gpu_mem_for_pids({p.pid for p in procs})
-
-                writer.writerow([
-                    time.time() - start,
-                    cpu_total,
-                    rss_total_mb,
-                    threads_total,
-                    alive,
-                    gpu_util,
-                    gpu_mem,
-                    proc_tree_gpu_mem,
-                ])
-
-                f.flush()
-                time.sleep(interval)
-
-            except psutil.NoSuchProcess:
-                print("Process ended.")
-                break
-            except KeyboardInterrupt:
-                print("Stopped by user.")
-                break
+        stop = stop_event or threading.Event()
+        _time = time.time
+        _wait = stop.wait
+        start = _time()
+        tick = 0
+        refresh = False
+        rows = []
 
+        try:
+            while not stop.is_set():
+                try:
+                    # WebEngine children can appear later, so refresh periodically
+                    if refresh or tick % PROC_TREE_REFRESH_TICKS == 0:
+                        known = {p.pid: p for p in procs}
+                        procs = _get_proc_tree(root, known)
+                        _warmup_cpu([p for p in procs if p.pid not in known])
+                        proc_pids = frozenset(p.pid for p in procs)
+                    tick += 1
+
+                    now = _time()
+                    cpu_total, rss_total_mb, threads_total, alive = _sum_cpu_mem_threads(procs)
+                    refresh = alive != len(procs)
+
+                    gpu_util, gpu_mem = _get_gpu_overall()
+                    proc_tree_gpu_mem = _get_gpu_mem_for_pids(proc_pids)
+
+                    rows.append([
+                        now - start,
+                        cpu_total,
+                        rss_total_mb,
+                        threads_total,
+                        alive,
+                        gpu_util,
+                        gpu_mem,
+                        proc_tree_gpu_mem,
+                    ])
+                    if len(rows) >= ROWS_PER_WRITE:
+                        writer.writerows(rows)
+                        f.flush()
+                        rows.clear()
+
+                    _wait(interval)
+
+                except psutil.NoSuchProcess:
+                    print("Process ended.")
+                    break
+                except KeyboardInterrupt:
+                    print("Stopped by user.")
+                    break
+        finally:
+            # write the partial batch (also runs on sys.exit from the signal handler)
+            if rows:
+                writer.writerows(rows)
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
@@ -26,6 +26,7 @@ import time
 from typing import Any, Dict, Optional
 
 import requests
+from requests.adapters import HTTPAdapter
 
 
 # --------- Fixed config (keep deterministic for hardware validation) ---------
@@ -74,13 +75,20 @@ def pick_free_port(preferred: int = 11434) -> int:
         return int(s.getsockname()[1])
 
 
-def wait_for_ollama_ready(base_url: str, timeout_s: float = 12.0) -> bool:
+def make_session() -> requests.Session:
+    """One keep-alive session shared by readiness polling and generation."""
+    session = requests.Session()
+    session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+    return session
+
+
+def wait_for_ollama_ready(base_url: str, session: requests.Session, timeout_s: float = 12.0) -> bool:
     """Wait until Ollama responds (poll /api/tags)."""
     deadline = time.time() + timeout_s
     url = base_url.rstrip("/") + "/api/tags"
     while time.time() < deadline:
         try:
-            r = requests.get(url, timeout=1.0)
+            r = session.get(url, timeout=1.0)
             if r.status_code == 200:
                 return True
         except Exception:
@@ -103,7 +111,7 @@ def terminate_proc(p: Optional[subprocess.Popen]) -> None:
         pass
 
 
-def ask_once(base_url: str, model: str, prompt: str) -> str:
+def ask_once(base_url: str, session: requests.Session, model: str, prompt: str) -> str:
     """Single non-streaming call to Ollama /api/generate (blocks until done)."""
     url = base_url.rstrip("/") + "/api/generate"
     payload: Dict[str, Any] = {
@@ -115,7 +123,7 @@ def ask_once(base_url: str, model: str, prompt: str) -> str:
             "num_predict": NUM_PREDICT,
         },
     }
-    r = requests.post(url, json=payload, timeout=HTTP_TIMEOUT_S)
+    r = session.post(url, json=payload, timeout=HTTP_TIMEOUT_S)
     r.raise_for_status()
     data = r.json()
     return (data.get("response") or "").strip()
@@ -134,6 +142,7 @@ def main() -> int:
 
     ollama_proc: Optional[subprocess.Popen] = None
     monitor_proc: Optional[subprocess.Popen] = None
+    session = make_session()
 
     try:
         ollama_proc = subprocess.Popen(
@@ -144,7 +153,7 @@ def main() -> int:
             stderr=stderr,
         )
 
-        if not wait_for_ollama_ready(base_url, timeout_s=12.0):
+        if not wait_for_ollama_ready(base_url, session, timeout_s=12.0):
             print("[error] Ollama server did not become ready in time.")
             return 2
 
@@ -171,7 +180,7 @@ def main() -> int:
 
         # 4) One blocking generation (this is the window you care about)
         print("[phase] generate start")
-        response = ask_once(base_url=base_url, model=MODEL, prompt=PROMPT)
+        response = ask_once(base_url=base_url, session=session, model=MODEL, prompt=PROMPT)
         print("[phase] generate done")
 
         if PRINT_RESPONSE:
@@ -197,6 +206,7 @@ def main() -> int:
         print("\n[stopped] by user")
         return 130
     finally:
+        session.close()
         terminate_proc(monitor_proc)
         terminate_proc(ollama_proc)
 